@@ -1,4 +1,4 @@
-#include "../testdata/headers/cxx-runtime-lifecycle.hpp"
+#include "../../testdata/headers/cxx-runtime-lifecycle.hpp"
 
 namespace {
 int live_count = 0;
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Compare CLI run times with and without a precompiled prelude.
+
+Every API header of an SDK usually includes one large common header.  This
+binds each API header with a plain run, then with ``--prelude``: once against
+an empty cache, which precompiles the prelude, and then warm.  The bindings
+of every run must be identical apart from the command line they record.  Without ``--prelude``/``--header`` a
+synthetic SDK is generated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def default_cli() -> Path:
+    executable = "cjbind_cli.exe" if os.name == "nt" else "cjbind_cli"
+    candidates = [
+        ROOT / "target/release/bin" / executable,
+        ROOT / "target/debug/bin" / executable,
+    ]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    locations = ", ".join(str(candidate) for candidate in candidates)
+    raise RuntimeError(f"an existing CLI executable is required; checked: {locations}")
+
+
+def write_synthetic_sdk(directory: Path, declarations: int, headers: int) -> tuple[Path, list[Path]]:
+    prelude = directory / "sdk_prelude.h"
+    # No system headers, so the runs do not depend on detected include paths.
+    lines = ["#pragma once"]
+    for index in range(declarations):
+        lines.append(
+            f"typedef struct sdk_record_{index} {{ int id; double weight; "
+            f"unsigned flags : 3; const char *name; }} sdk_record_{index};"
+        )
+        lines.append(f"int sdk_record_{index}_touch(sdk_record_{index} *record, unsigned long count);")
+        lines.append(f"#define SDK_RECORD_{index}_SIZE sizeof(sdk_record_{index})")
+    prelude.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    api_headers = []
+    for index in range(headers):
+        header = directory / f"sdk_api_{index}.h"
+        header.write_text(
+            f'#include "sdk_prelude.h"\n'
+            f"typedef struct sdk_api_{index} {{ sdk_record_{index % declarations} record; }} sdk_api_{index};\n"
+            f"int sdk_api_{index}_open(sdk_api_{index} *api);\n",
+            encoding="utf-8",
+        )
+        api_headers.append(header)
+    return prelude, api_headers
+
+
+def bind(cli: Path, header: Path, output: Path, extra: list[str], clang_args: list[str]) -> float:
+    command = [str(cli), str(header), "-o", str(output), "--no-detect-include-path", *extra]
+    if clang_args:
+        command.extend(["--", *clang_args])
+    start = time.perf_counter()
+    result = subprocess.run(
+        command,
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        check=False,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with {result.returncode}:\n{result.stderr}")
+    return elapsed
+
+
+def binding_text(path: Path) -> list[str]:
+    """The generated bindings without the header line that records the command line."""
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line for line in lines if not line.lstrip().startswith("// cjbind 命令行")]
+
+
+def describe(label: str, samples: list[float]) -> str:
+    return (
+        f"{label:<14} median {statistics.median(samples) * 1000:8.1f} ms  "
+        f"min {min(samples) * 1000:8.1f} ms  total {sum(samples):7.2f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cli", type=Path, help="path to an existing cjbind_cli executable")
+    parser.add_argument("--prelude", type=Path, help="common header included by every API header")
+    parser.add_argument("--header", type=Path, action="append", default=[], help="API header to bind, repeatable")
+    parser.add_argument("--declarations", type=int, default=2000, help="synthetic prelude size")
+    parser.add_argument("--headers", type=int, default=8, help="synthetic API header count")
+    parser.add_argument("--rounds", type=int, default=3, help="warm runs per header")
+    parser.add_argument("clang_args", nargs="*", help="arguments passed to clang after --")
+    args = parser.parse_args()
+
+    cli = args.cli.resolve() if args.cli is not None else default_cli()
+    if (args.prelude is None) != (not args.header):
+        parser.error("--prelude and --header must be given together")
+
+    with tempfile.TemporaryDirectory(prefix="cjbind-prelude-bench-") as temp:
+        directory = Path(temp)
+        if args.prelude is None:
+            prelude, headers = write_synthetic_sdk(directory, args.declarations, args.headers)
+        else:
+            prelude, headers = args.prelude.resolve(), [header.resolve() for header in args.header]
+        cache = directory / "pch-cache"
+        prelude_flags = ["--prelude", str(prelude), "--pch-cache-dir", str(cache)]
+
+        plain: list[float] = []
+        warm: list[float] = []
+        cold = 0.0
+        for index, header in enumerate(headers):
+            expected = directory / f"plain_{index}.cj"
+            for _ in range(args.rounds):
+                plain.append(bind(cli, header, expected, [], args.clang_args))
+
+            output = directory / f"prelude_{index}.cj"
+            if index == 0:
+                cold = bind(cli, header, output, prelude_flags, args.clang_args)
+            for _ in range(args.rounds):
+                warm.append(bind(cli, header, output, prelude_flags, args.clang_args))
+                # The runs differ in their flags, which the bindings record.
+                if binding_text(output) != binding_text(expected):
+                    raise AssertionError(f"bindings of {header} differ with --prelude")
+
+    print(f"{len(headers)} headers, {args.rounds} rounds each")
+    print(describe("plain", plain))
+    print(f"{'cold prelude':<14} {cold * 1000:8.1f} ms (precompiles the prelude)")
+    print(describe("warm prelude", warm))
+    speedup = statistics.median(plain) / statistics.median(warm)
+    print(f"warm speedup   {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
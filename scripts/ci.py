@@ -0,0 +1,290 @@
+# /// script
+# requires-python = ">=3.13"
+# dependencies = []
+# ///
+
+"""Run the test workflow's stages locally as a dependency graph.
+
+The stages of .github/workflows/test.yml run as soon as the stages they
+depend on have passed, several at once.  The static CLI build compiles
+the library once into target/, and the generator, CLI and snapshot tests
+then run in that same directory, reusing the library objects instead of
+each building and linking LLVM again.  cjpm does not lock its target
+directory, so the stages that share it run one at a time while the
+script stages fan out beside them; --isolated-targets gives each test
+stage its own directory instead, which trades three more library builds
+and LLVM links for running the tests side by side on machines with many
+free cores.  A stage that passed is skipped while the digest of its inputs (source
+files, command and the stages it depends on) is unchanged.  A timing
+report closes every run.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CI_DIR = ROOT / "target/ci"
+CACHE_FILE = CI_DIR / "cache.json"
+
+LIBRARY_INPUTS = ["cjbind/**/*", "cjbind_token/**/*", "cjpm.toml", "cjpm.lock", "scripts/cjpm.py", "scripts/libclang.json"]
+
+
+@dataclass
+class Stage:
+    name: str
+    command: list[str]
+    inputs: list[str]
+    needs: list[str] = field(default_factory=list)
+    # Platforms the workflow runs the stage on; empty means all of them.
+    platforms: set[str] = field(default_factory=set)
+    # Files the stage produces; a cached result only counts while they exist.
+    outputs: list[str] = field(default_factory=list)
+    # Stages naming the same resource never run at the same time.
+    resource: str | None = None
+
+
+def cjpm_stage(name: str, module: str, inputs: list[str], isolated: bool) -> Stage:
+    command = [sys.executable, "scripts/cjpm.py", "--static", "test", "-m", module, "-V"]
+    if isolated:
+        return Stage(name, [*command, "--target-dir", str(CI_DIR / "targets" / name)], inputs)
+    return Stage(name, command, inputs, needs=["build-cli"], resource="target")
+
+
+def stages(isolated: bool = False) -> list[Stage]:
+    python = sys.executable
+    return [
+        Stage(
+            "tokenizer",
+            ["cjpm", "test", "-m", "cjbind_token", "-V", "--target-dir", str(CI_DIR / "targets/tokenizer")],
+            ["cjbind_token/**/*", "cjpm.toml", "cjpm.lock"],
+        ),
+        # Builds the executable the script stages pick up from target/.
+        Stage(
+            "build-cli",
+            [python, "scripts/cjpm.py", "--static", "build", "-m", "cjbind_cli", "-V"],
+            [*LIBRARY_INPUTS, "cjbind_cli/**/*"],
+            outputs=["target/release/bin/" + ("cjbind_cli.exe" if os.name == "nt" else "cjbind_cli")],
+            resource="target",
+        ),
+        # Snapshots first: the C++ runtime stage waits on them.
+        cjpm_stage("snapshots", "cjbind_test", [*LIBRARY_INPUTS, "cjbind_test/**/*"], isolated),
+        cjpm_stage("generator", "cjbind", LIBRARY_INPUTS, isolated),
+        cjpm_stage("cli", "cjbind_cli", [*LIBRARY_INPUTS, "cjbind_cli/**/*"], isolated),
+        Stage(
+            "compile-generated",
+            [python, "scripts/compile_generated.py", "--skip-build"],
+            ["scripts/compile_generated.py", "cjbind_test/testdata/headers/**/*"],
+            needs=["build-cli"],
+            platforms={"linux"},
+        ),
+        Stage(
+            "cli-diagnostics",
+            [python, "scripts/test_cli_diagnostics.py"],
+            ["scripts/test_cli_diagnostics.py", "scripts/testdata/**/*"],
+            needs=["build-cli"],
+            platforms={"linux"},
+        ),
+        Stage(
+            "cxx-runtime",
+            [python, "scripts/test_cxx_runtime.py"],
+            ["scripts/test_cxx_runtime.py", "cjbind_test/runtime/**/*", "cjbind_test/testdata/expected/**/*"],
+            needs=["snapshots"],
+            platforms={"linux"},
+        ),
+    ]
+
+
+def input_files(patterns: list[str]) -> list[Path]:
+    files: set[Path] = set()
+    for pattern in patterns:
+        for path in ROOT.glob(pattern):
+            if path.is_file() and "target" not in path.relative_to(ROOT).parts:
+                files.add(path)
+    return sorted(files)
+
+
+def check_inputs(all_stages: list[Stage]) -> None:
+    """Fail when an input pattern matches no file.
+
+    A pattern that matches nothing leaves the stage's digest unchanged by
+    every edit, so the stage would be reported as cached forever.
+    """
+    empty = [
+        f"{stage.name}: {pattern}"
+        for stage in all_stages
+        for pattern in stage.inputs
+        if not input_files([pattern])
+    ]
+    if empty:
+        raise SystemExit("input patterns match no files:\n  " + "\n  ".join(empty))
+
+
+def stage_digest(stage: Stage, dependencies: list[str]) -> str:
+    """Digest of everything a stage's result depends on."""
+    digest = hashlib.sha256()
+    relative = [arg.replace(sys.executable, "python") for arg in stage.command]
+    digest.update(json.dumps([sys.platform, relative, dependencies]).encode("utf-8"))
+    for path in input_files(stage.inputs):
+        digest.update(path.relative_to(ROOT).as_posix().encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def select(all_stages: list[Stage], names: list[str]) -> list[Stage]:
+    """The named stages and everything they need, in declaration order."""
+    by_name = {stage.name: stage for stage in all_stages}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise SystemExit(f"unknown stage {', '.join(unknown)}; choose from {', '.join(by_name)}")
+    wanted: set[str] = set()
+    pending = list(names) if names else list(by_name)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(by_name[name].needs)
+    return [stage for stage in all_stages if stage.name in wanted]
+
+
+@dataclass
+class Outcome:
+    status: str
+    seconds: float = 0.0
+    digest: str | None = None
+
+
+def run_stage(stage: Stage, log: Path) -> tuple[bool, float]:
+    start = time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        f.write("+ " + " ".join(stage.command) + "\n")
+        f.flush()
+        result = subprocess.run(stage.command, cwd=ROOT, stdout=f, stderr=subprocess.STDOUT, check=False)
+    return result.returncode == 0, time.perf_counter() - start
+
+
+def tail(log: Path, lines: int = 30) -> str:
+    text = log.read_text(encoding="utf-8", errors="replace").splitlines()
+    return "\n".join(text[-lines:])
+
+
+def run(selected: list[Stage], jobs: int, force: bool) -> dict[str, Outcome]:
+    cache: dict[str, str] = {}
+    if CACHE_FILE.is_file() and not force:
+        cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    (CI_DIR / "logs").mkdir(parents=True, exist_ok=True)
+
+    outcomes: dict[str, Outcome] = {}
+    remaining = list(selected)
+    running: dict[Future[tuple[bool, float]], tuple[Stage, str]] = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while remaining or running:
+            for stage in list(remaining):
+                states = [outcomes.get(need) for need in stage.needs]
+                if any(state is None for state in states):
+                    continue
+                if any(state.status in ("failed", "skipped") for state in states if state):
+                    remaining.remove(stage)
+                    outcomes[stage.name] = Outcome("skipped")
+                    print(f"[skip] {stage.name}: a stage it needs did not pass", flush=True)
+                    continue
+                if stage.platforms and sys.platform not in stage.platforms:
+                    remaining.remove(stage)
+                    outcomes[stage.name] = Outcome("n/a")
+                    continue
+                if stage.resource and any(other.resource == stage.resource for other, _ in running.values()):
+                    continue
+                remaining.remove(stage)
+                digest = stage_digest(stage, [outcomes[need].digest or "" for need in stage.needs])
+                produced = all((ROOT / output).is_file() for output in stage.outputs)
+                if cache.get(stage.name) == digest and produced:
+                    outcomes[stage.name] = Outcome("cached", digest=digest)
+                    print(f"[cached] {stage.name}", flush=True)
+                    continue
+                print(f"[start] {stage.name}", flush=True)
+                log = CI_DIR / "logs" / f"{stage.name}.log"
+                running[pool.submit(run_stage, stage, log)] = (stage, digest)
+
+            if not running:
+                if remaining:
+                    raise RuntimeError(f"unresolvable stages: {', '.join(stage.name for stage in remaining)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, digest = running.pop(future)
+                passed, seconds = future.result()
+                log = CI_DIR / "logs" / f"{stage.name}.log"
+                if passed:
+                    outcomes[stage.name] = Outcome("passed", seconds, digest)
+                    cache[stage.name] = digest
+                    print(f"[pass] {stage.name} in {seconds:.1f} s", flush=True)
+                else:
+                    outcomes[stage.name] = Outcome("failed", seconds, digest)
+                    cache.pop(stage.name, None)
+                    print(f"[fail] {stage.name} in {seconds:.1f} s, log: {log}\n{tail(log)}", flush=True)
+            CACHE_FILE.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+    return outcomes
+
+
+def report(selected: list[Stage], outcomes: dict[str, Outcome], wall: float) -> None:
+    by_name = {stage.name: stage for stage in selected}
+    finish: dict[str, float] = {}
+
+    def critical(name: str) -> float:
+        # Longest chain of stage durations ending at `name`.
+        if name not in finish:
+            before = max((critical(need) for need in by_name[name].needs), default=0.0)
+            finish[name] = before + outcomes[name].seconds
+        return finish[name]
+
+    width = max(len(stage.name) for stage in selected)
+    print(f"\n{'stage':<{width}}  {'status':<8} {'time':>8}")
+    for stage in sorted(selected, key=lambda s: outcomes[s.name].seconds, reverse=True):
+        outcome = outcomes[stage.name]
+        seconds = f"{outcome.seconds:7.1f}s" if outcome.status in ("passed", "failed") else f"{'-':>8}"
+        print(f"{stage.name:<{width}}  {outcome.status:<8} {seconds}")
+    serial = sum(outcome.seconds for outcome in outcomes.values())
+    path = max((critical(stage.name) for stage in selected), default=0.0)
+    print(f"\nwall {wall:.1f} s, serial sum {serial:.1f} s, critical path {path:.1f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("stages", nargs="*", help="stages to run, with the stages they need; default all")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)))
+    parser.add_argument("--force", action="store_true", help="ignore cached results")
+    parser.add_argument("--list", action="store_true", help="print the stages and exit")
+    parser.add_argument(
+        "--isolated-targets",
+        action="store_true",
+        help="build every cjpm test stage in its own target directory so they run concurrently",
+    )
+    args = parser.parse_args()
+
+    all_stages = stages(args.isolated_targets)
+    if args.list:
+        for stage in all_stages:
+            needs = f" (needs {', '.join(stage.needs)})" if stage.needs else ""
+            print(f"{stage.name}{needs}")
+        return
+
+    selected = select(all_stages, args.stages)
+    check_inputs(selected)
+    start = time.perf_counter()
+    outcomes = run(selected, max(1, args.jobs), args.force)
+    report(selected, outcomes, time.perf_counter() - start)
+    if any(outcome.status in ("failed", "skipped") for outcome in outcomes.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
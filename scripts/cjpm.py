@@ -8,6 +8,15 @@ import sys
 import subprocess
 import re
 import glob
+import hashlib
+import json
+import platform
+import shlex
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 import tomllib
 
@@ -360,18 +369,528 @@ def read_version():
     return data["package"]["version"]
 
 
-def parse_wrapper_args(args: list[str]) -> tuple[list[str], bool]:
+@dataclass
+class WrapperOptions:
+    """Flags consumed by this wrapper rather than forwarded to cjpm."""
+    static: bool = False
+    # Link static builds against a prelinked object instead of the archives.
+    prelink: bool = True
+    # Measure and print the link time the prelinked object saves.
+    prelink_report: bool = False
+    # Only build the prelinked object, without running cjpm.
+    prelink_only: bool = False
+    # Linker requested with --fast-link ("auto" picks the fastest found).
+    fast_link: str | None = None
+    # Record per-package, per-phase build times.
+    timings: bool = False
+    # Variants built concurrently by --matrix, e.g. ["static-release"].
+    matrix: list[str] | None = None
+    matrix_jobs: int = 2
+
+
+def parse_wrapper_args(args: list[str]) -> tuple[list[str], WrapperOptions]:
     """Extract wrapper-only flags and return arguments to forward to cjpm."""
     forwarded_args: list[str] = []
-    use_static = False
+    options = WrapperOptions()
 
     for arg in args:
-        if arg == "--static":
-            use_static = True
+        match arg:
+            case "--static":
+                options.static = True
+            case "--no-prelink":
+                options.prelink = False
+            case "--prelink-report":
+                options.prelink_report = True
+            case "--prelink-only":
+                options.prelink_only = True
+            case "--fast-link":
+                options.fast_link = "auto"
+            case _ if arg.startswith("--fast-link="):
+                options.fast_link = arg.split("=", 1)[1]
+            case "--timings":
+                options.timings = True
+            case "--matrix":
+                options.matrix = list(MATRIX_VARIANTS)
+            case _ if arg.startswith("--matrix="):
+                options.matrix = [v.strip() for v in arg.split("=", 1)[1].split(",") if v.strip()]
+            case _ if arg.startswith("--matrix-jobs="):
+                options.matrix_jobs = int(arg.split("=", 1)[1])
+            case _:
+                forwarded_args.append(arg)
+
+    return forwarded_args, options
+
+
+def libclang_entry_points() -> list[str]:
+    """The libclang functions cjbind calls, from its foreign declarations."""
+    source = os.path.join(root_dir(), "cjbind", "src", "clang", "libclang.cj")
+    with open(source, "r", encoding="utf-8") as f:
+        return sorted(set(re.findall(r"^\s*foreign func (clang_\w+)", f.read(), re.MULTILINE)))
+
+
+def prelink_fingerprint(archives: list[Path], entry_points: list[str]) -> str:
+    """Digest of everything the prelinked object is derived from."""
+    digest = hashlib.sha256()
+    for part in (sys.platform, platform.machine(), run_llvm_config("--version"), *entry_points):
+        digest.update(part.encode("utf-8") + b"\0")
+    for archive in archives:
+        stat = archive.stat()
+        digest.update(f"{archive.name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def time_archive_resolution(linker: str, inputs: list[str], entry_points: list[str], scratch: str) -> float | None:
+    """Seconds a link spends resolving the libclang entry points from `inputs`."""
+    command = [linker, "-o", os.path.join(scratch, "probe"), "-e", "0", "--unresolved-symbols=ignore-all"]
+    command += [f"--undefined={symbol}" for symbol in entry_points]
+    command += ["--start-group", *inputs, "--end-group"]
+    start = time.perf_counter()
+    if subprocess.run(command, capture_output=True).returncode != 0:
+        return None
+    return time.perf_counter() - start
+
+
+def describe_link_savings(stats: dict) -> str:
+    if stats.get("archives_ms") is None or stats.get("prelinked_ms") is None:
+        return "archive resolution per link: not measured"
+    return f"archive resolution per link: {stats['archives_ms']:.0f} ms -> {stats['prelinked_ms']:.0f} ms"
+
+
+def report_link_savings(linker: str, archives: list[Path], entry_points: list[str], prelinked: Path) -> None:
+    """Print how much archive resolution the prelinked object saves a link.
+
+    Measuring takes two extra links, one of them over every LLVM archive, so
+    it only runs for --prelink-report; the result is kept beside the object.
+    """
+    report = prelinked.with_suffix(".json")
+    stats = json.loads(report.read_text(encoding="utf-8")) if report.is_file() else {}
+    if stats.get("archives_ms") is None or stats.get("prelinked_ms") is None:
+        with tempfile.TemporaryDirectory(dir=prelinked.parent) as scratch:
+            archives_seconds = time_archive_resolution(linker, list(map(str, archives)), entry_points, scratch)
+            prelinked_seconds = time_archive_resolution(linker, [str(prelinked)], entry_points, scratch)
+            stats = {
+                "archives": len(archives),
+                "archives_ms": archives_seconds * 1000 if archives_seconds is not None else None,
+                "prelinked_ms": prelinked_seconds * 1000 if prelinked_seconds is not None else None,
+            }
+            with open(os.path.join(scratch, "report.json"), "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+            os.replace(os.path.join(scratch, "report.json"), report)
+    print(f"Prelinked LLVM: {describe_link_savings(stats)}", flush=True)
+
+
+def ensure_prelinked_llvm(static_libs: list[str], report: bool = False) -> str | None:
+    """Merge the libclang and LLVM archive members cjbind needs into one object.
+
+    `ld -r` pulls from the archives exactly the members reachable from the
+    libclang entry points cjbind declares, the same set a final link would
+    extract, and leaves C++ runtime and system symbols undefined.  The
+    result is cached in the libclang tree under a fingerprint of its
+    archives, the platform and the entry points, so it is built once per
+    install.  With `report`, also prints the link time it saves.  Returns
+    the object's path, or None where relocatable links are unsupported or
+    the result is incomplete.
+    """
+    if sys.platform != "linux":
+        return None
+    linker = shutil.which("ld")
+    nm = shutil.which("nm")
+    if linker is None or nm is None:
+        print("Warning: ld/nm not found, linking against the LLVM archives", flush=True)
+        return None
+
+    libdir = Path(run_llvm_config("--libdir"))
+    archives = [libdir / f"lib{lib[2:]}.a" for lib in static_libs]
+    archives += sorted(Path(libclang_dir(), "lib").glob("libclang*.a"))
+    archives = [archive for archive in archives if archive.is_file()]
+    entry_points = libclang_entry_points()
+
+    cache_dir = Path(libclang_dir(), "prelinked")
+    key = prelink_fingerprint(archives, entry_points)
+    prelinked = cache_dir / f"cjbind_llvm-{key}.o"
+    if prelinked.is_file():
+        print(f"Using prelinked LLVM: {prelinked}", flush=True)
+        if report:
+            report_link_savings(linker, archives, entry_points, prelinked)
+        return str(prelinked)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Prelinking {len(archives)} LLVM archives for {len(entry_points)} libclang entry points...", flush=True)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as scratch:
+        built = os.path.join(scratch, "cjbind_llvm.o")
+        command = [linker, "-r", "-o", built]
+        command += [f"--undefined={symbol}" for symbol in entry_points]
+        command += ["--start-group", *map(str, archives), "--end-group"]
+        start = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"Warning: prelink failed, linking against the LLVM archives:\n{result.stderr}", flush=True)
+            return None
+        build_seconds = time.perf_counter() - start
+
+        defined = subprocess.run(
+            [nm, "-g", "--defined-only", "--format=just-symbols", built],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        missing = set(entry_points) - set(defined)
+        if missing:
+            print(f"Warning: prelinked object lacks {', '.join(sorted(missing))}, linking against the LLVM archives", flush=True)
+            return None
+        os.replace(built, prelinked)
+
+    print(f"Prelinked LLVM into {prelinked} in {build_seconds:.1f} s", flush=True)
+    if report:
+        report_link_savings(linker, archives, entry_points, prelinked)
+    return str(prelinked)
+
+
+def prelink_only(options: WrapperOptions) -> int:
+    """Build the prelinked LLVM object without running cjpm.
+
+    CI runs this before saving the libclang cache so that later jobs restore
+    the object instead of each prelinking again.  A missing object is not an
+    error: static builds then link against the archives.
+    """
+    static_libs = run_llvm_config("--link-static", "--libs").split()
+    if ensure_prelinked_llvm(static_libs, options.prelink_report) is None:
+        print("No prelinked LLVM object built; static builds link against the archives", flush=True)
+    return 0
+
+
+# Linkers accepting GNU ld options, fastest first.
+FAST_LINKERS = {
+    "mold": "mold",
+    "lld": "ld.lld",
+    "gold": "ld.gold",
+    "bfd": "ld.bfd",
+}
+
+LINK_SHIM = """#!{python}
+import json, os, subprocess, sys, time
+args = sys.argv[1:]
+output = args[args.index("-o") + 1] if "-o" in args[:-1] else "a.out"
+start = time.perf_counter()
+status = subprocess.call([{linker!r}, *{extra!r}, *args])
+elapsed = (time.perf_counter() - start) * 1000
+with open({log!r}, "a", encoding="utf-8") as f:
+    f.write(json.dumps({{"output": os.path.basename(output), "ms": elapsed, "ok": status == 0}}) + "\\n")
+sys.exit(status)
+"""
+
+
+def fast_link_dir() -> str:
+    return os.path.join(root_dir(), "target", ".fast-link")
+
+
+def select_fast_linker(requested: str) -> tuple[str, str] | None:
+    """Return (name, executable) of the requested linker, or of the fastest found."""
+    names = list(FAST_LINKERS) if requested == "auto" else [requested]
+    for name in names:
+        if name not in FAST_LINKERS:
+            raise SystemExit(f"Unknown --fast-link linker {name!r}; choose from {', '.join(FAST_LINKERS)}")
+        executable = shutil.which(FAST_LINKERS[name])
+        if executable:
+            return name, executable
+    return None
+
+
+def split_debug_flags(name: str, executable: str) -> list[str]:
+    """Linker flags writing debug info to a separate file, where supported.
+
+    cjc has no -gsplit-dwarf, so this is done at link time, which only mold
+    offers: it writes the .dbg file in the background after the output.
+    """
+    if name != "mold":
+        return []
+    help_text = subprocess.run([executable, "--help"], capture_output=True, text=True).stdout
+    return ["--separate-debug-file"] if "--separate-debug-file" in help_text else []
+
+
+def install_fast_linker(env, options: "WrapperOptions", debug: bool) -> str | None:
+    """Put a timing `ld` shim running the selected linker first on PATH.
+
+    cjc runs the `ld` it finds on PATH for the final link of every
+    executable, so the shim selects the linker for cjbind_cli and each test
+    binary alike and logs how long each link took.  Returns the linker name.
+    """
+    if sys.platform != "linux":
+        print(f"Warning: --fast-link is only supported on Linux, ignoring it on {sys.platform}", flush=True)
+        return None
+    selected = select_fast_linker(options.fast_link or "auto")
+    if selected is None:
+        print(f"Warning: linker {options.fast_link} not found, using the default linker", flush=True)
+        return None
+    name, executable = selected
+    extra = split_debug_flags(name, executable) if debug else []
+
+    directory = Path(fast_link_dir())
+    shim_dir = directory / "bin"
+    shim_dir.mkdir(parents=True, exist_ok=True)
+    log = directory / "links.jsonl"
+    log.unlink(missing_ok=True)
+    shim = shim_dir / "ld"
+    shim.write_text(
+        LINK_SHIM.format(python=sys.executable, linker=executable, extra=extra, log=str(log)),
+        encoding="utf-8",
+    )
+    shim.chmod(0o755)
+    env["PATH"] = str(shim_dir) + os.pathsep + env.get("PATH", "")
+    print(f"Fast link: {name} ({executable}){' with split debug info' if extra else ''}", flush=True)
+    return name
+
+
+def report_link_times(linker: str) -> None:
+    """Print this build's link times next to the last ones of other linkers."""
+    directory = Path(fast_link_dir())
+    log = directory / "links.jsonl"
+    if not log.is_file():
+        return
+    links = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines() if line]
+    history_file = directory / "history.json"
+    history: dict[str, dict[str, float]] = {}
+    if history_file.is_file():
+        try:
+            history = json.loads(history_file.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            history = {}
+
+    print(f"Link times ({linker}):", flush=True)
+    for link in links:
+        if not link["ok"]:
             continue
-        forwarded_args.append(arg)
+        previous = history.get(link["output"], {})
+        others = "  ".join(
+            f"{other} {ms:.0f} ms ({ms / link['ms']:.1f}x)" for other, ms in sorted(previous.items()) if other != linker
+        )
+        print(f"  {link['output']:<40} {link['ms']:8.0f} ms  {others}", flush=True)
+        history.setdefault(link["output"], {})[linker] = link["ms"]
+    history_file.write_text(json.dumps(history, indent=2), encoding="utf-8")
+
+
+# Tools whose invocation, as echoed by verbose cjc, starts a build phase.
+PHASE_TOOLS = {
+    "cjc-frontend": "frontend",
+    "opt": "opt",
+    "llc": "codegen",
+    "ar": "archive",
+    "llvm-ar": "archive",
+    "ld": "link",
+    "ld.lld": "link",
+    "ld64.lld": "link",
+    "ld.gold": "link",
+    "ld.bfd": "link",
+    "mold": "link",
+}
 
-    return forwarded_args, use_static
+PHASE_ORDER = ["cjpm", "driver", "frontend", "opt", "codegen", "archive", "link"]
+
+TIMINGS_HISTORY_LIMIT = 50
+
+
+def timings_file() -> str:
+    return os.path.join(root_dir(), "target", ".timings", "history.json")
+
+
+def command_tool(line: str) -> tuple[str, list[str]] | None:
+    """The tool name and arguments of a command line echoed by cjpm/cjc -V."""
+    try:
+        words = shlex.split(line.strip())
+    except ValueError:
+        return None
+    if not words:
+        return None
+    name = os.path.basename(words[0])
+    if name.endswith(".exe"):
+        name = name[:-4]
+    return name, words[1:]
+
+
+def unit_name(args: list[str]) -> str:
+    """The package or executable a cjc invocation builds, from its output."""
+    for flag in ("-o", "--output"):
+        if flag in args[:-1]:
+            output = os.path.basename(args[args.index(flag) + 1])
+            match = re.fullmatch(r"lib(.+)\.(a|so|dll|dylib)", output)
+            return match.group(1) if match else output
+    for index, arg in enumerate(args[:-1]):
+        if arg in ("-p", "--package"):
+            return os.path.relpath(args[index + 1], root_dir())
+    return "build"
+
+
+class BuildTimer:
+    """Attributes wall time to (unit, phase) pairs from verbose build output.
+
+    A phase lasts from the line that starts it to the line that starts the
+    next one.  Concurrent package builds interleave their output, so the
+    wrapper runs cjpm with one job while timing.
+    """
+
+    def __init__(self, start: float):
+        self.unit = "build"
+        self.phase = "cjpm"
+        self.since = start
+        self.start = start
+        self.totals: dict[str, dict[str, float]] = {}
+
+    def _switch(self, unit: str, phase: str, now: float) -> None:
+        phases = self.totals.setdefault(self.unit, {})
+        phases[self.phase] = phases.get(self.phase, 0.0) + (now - self.since)
+        self.unit, self.phase, self.since = unit, phase, now
+
+    def feed(self, line: str, now: float) -> None:
+        parsed = command_tool(line)
+        if parsed is None:
+            return
+        name, args = parsed
+        if name == "cjc":
+            self._switch(unit_name(args), "driver", now)
+        elif name in PHASE_TOOLS or name.startswith("opt"):
+            self._switch(self.unit, PHASE_TOOLS.get(name, "opt"), now)
+
+    def finish(self, now: float) -> dict:
+        self._switch(self.unit, self.phase, now)
+        return {
+            "total": now - self.start,
+            "units": {unit: phases for unit, phases in self.totals.items() if sum(phases.values()) > 0},
+        }
+
+
+def run_timed(command: list[str], env) -> int:
+    """Run cjpm, echoing its output, and record where the time went."""
+    timer = BuildTimer(time.perf_counter())
+    process = subprocess.Popen(
+        command,
+        env=env,
+        stdin=sys.stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    assert process.stdout is not None
+    for line in process.stdout:
+        timer.feed(line, time.perf_counter())
+        sys.stdout.write(line)
+    returncode = process.wait()
+    run = timer.finish(time.perf_counter())
+    run["args"] = command[1:]
+    run["returncode"] = returncode
+    run["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    report_timings(run)
+    return returncode
+
+
+def report_timings(run: dict) -> None:
+    """Print a ranked summary, compare it with the previous run of the same
+    command and append the run to the history file."""
+    history_path = Path(timings_file())
+    history: list[dict] = []
+    if history_path.is_file():
+        try:
+            history = json.loads(history_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            history = []
+    previous = next((r for r in reversed(history) if r["args"] == run["args"] and r["returncode"] == 0), None)
+
+    def delta(current: float, before: float | None) -> str:
+        if before is None:
+            return ""
+        change = current - before
+        percent = f" {change / before * 100:+.0f}%" if before > 0 else ""
+        return f"{change:+7.2f} s{percent}"
+
+    seen = {phase for phases in run["units"].values() for phase in phases}
+    phases = [phase for phase in PHASE_ORDER if phase in seen]
+    ranked = sorted(run["units"].items(), key=lambda item: sum(item[1].values()), reverse=True)
+    width = max([len(unit) for unit in run["units"]] + [7])
+    print(f"\nBuild timings ({run['total']:.2f} s total):", flush=True)
+    print(f"  {'package':<{width}} {'total':>8} " + " ".join(f"{phase:>9}" for phase in phases) + "  vs previous")
+    for unit, unit_phases in ranked:
+        total = sum(unit_phases.values())
+        before = previous["units"].get(unit) if previous else None
+        print(
+            f"  {unit:<{width}} {total:7.2f}s "
+            + " ".join(f"{unit_phases.get(phase, 0.0):8.2f}s" for phase in phases)
+            + f"  {delta(total, sum(before.values()) if before else None)}",
+            flush=True,
+        )
+    if previous:
+        print(f"  {'(all)':<{width}} {run['total']:7.2f}s  vs {previous['time']}: {delta(run['total'], previous['total'])}")
+
+    history.append(run)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    history_path.write_text(json.dumps(history[-TIMINGS_HISTORY_LIMIT:], indent=2), encoding="utf-8")
+
+
+MATRIX_VARIANTS = ["static-release", "static-debug", "dynamic-release", "dynamic-debug"]
+
+
+@dataclass
+class VariantResult:
+    name: str
+    returncode: int
+    seconds: float
+    artifact: Path | None
+    log: Path
+
+
+def run_matrix(cjpm_args: list[str], options: WrapperOptions) -> int:
+    """Build each variant concurrently into its own target directory.
+
+    Every variant gets its own environment from preprocess_environment, its
+    own --cfg_*_libclang flag and target/matrix/<variant> as target
+    directory, so LDFLAGS and build outputs never mix.  Output goes to a
+    log file per variant instead of interleaving on the terminal.
+    """
+    unknown = [variant for variant in options.matrix or [] if variant not in MATRIX_VARIANTS]
+    if unknown or not options.matrix:
+        raise SystemExit(f"Unknown --matrix variant {', '.join(unknown)}; choose from {', '.join(MATRIX_VARIANTS)}")
+    if options.timings or options.fast_link or options.static:
+        raise SystemExit("--matrix cannot be combined with --static, --timings or --fast-link")
+
+    matrix_dir = Path(root_dir(), "target", "matrix")
+    matrix_dir.mkdir(parents=True, exist_ok=True)
+    base_args = [arg for arg in cjpm_args if arg != "-g"]
+
+    # Prepare serially: it prints, and may build the shared prelinked object.
+    prepared = []
+    for variant in options.matrix:
+        link_mode, build_mode = variant.split("-")
+        debug = build_mode == "debug"
+        args = base_args + (["-g"] if debug else []) + [f"--cfg_{link_mode}_libclang"]
+        args += ["--target-dir", str(matrix_dir / variant)]
+        print(f"== {variant}", flush=True)
+        env = preprocess_environment(
+            os.environ.copy(), args, replace(options, static=link_mode == "static", matrix=None)
+        )
+        prepared.append((variant, args, env))
+
+    def build(variant: str, args: list[str], env) -> VariantResult:
+        log = matrix_dir / f"{variant}.log"
+        start = time.perf_counter()
+        with open(log, "w", encoding="utf-8") as f:
+            returncode = subprocess.run(["cjpm", *args], env=env, stdout=f, stderr=subprocess.STDOUT).returncode
+        seconds = time.perf_counter() - start
+        profile = "debug" if variant.endswith("debug") else "release"
+        executable = "cjbind_cli.exe" if sys.platform == "win32" else "cjbind_cli"
+        artifact = matrix_dir / variant / profile / "bin" / executable
+        status = "ok" if returncode == 0 else f"failed ({returncode})"
+        print(f"{variant}: {status} in {seconds:.1f} s, log: {log}", flush=True)
+        return VariantResult(variant, returncode, seconds, artifact if artifact.is_file() else None, log)
+
+    jobs = max(1, min(options.matrix_jobs, len(prepared)))
+    print(f"Building {len(prepared)} variants, {jobs} at a time...", flush=True)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda item: build(*item), prepared))
+
+    print(f"\n{'variant':<16} {'status':<8} {'time':>9} {'size':>10}  artifact")
+    for result in results:
+        status = "ok" if result.returncode == 0 else "failed"
+        size = f"{result.artifact.stat().st_size / 2**20:8.1f}MB" if result.artifact else f"{'-':>10}"
+        print(f"{result.name:<16} {status:<8} {result.seconds:8.1f}s {size}  {result.artifact or result.log}")
+    return 0 if all(result.returncode == 0 for result in results) else 1
 
 
 def read_passes_cache() -> dict | None:
@@ -387,10 +906,10 @@ def read_passes_cache() -> dict | None:
     return None
 
 
-def preprocess_environment(env, cjpm_args: list[str], use_static: bool):
+def preprocess_environment(env, cjpm_args: list[str], options: WrapperOptions):
     builder = LdFlagsBuilder()
     debug = "-g" in cjpm_args
-    dynamic = not use_static
+    dynamic = not options.static
 
     # Print build mode info
     link_mode = "dynamic" if dynamic else "static"
@@ -410,8 +929,11 @@ def preprocess_environment(env, cjpm_args: list[str], use_static: bool):
     else:
         print("Warning: .passes_cache not found, opt wrapper may fail", flush=True)
 
+    # Fast-link builds skip stripping and section GC: both only cost link time.
+    fast_link = options.fast_link is not None and sys.platform == "linux"
+
     # Strip flag (release mode only, not on darwin)
-    if not debug and sys.platform != "darwin":
+    if not debug and not fast_link and sys.platform != "darwin":
         builder.add("--strip-all")
 
     # Library search path (only for static linking)
@@ -430,7 +952,7 @@ def preprocess_environment(env, cjpm_args: list[str], use_static: bool):
         case "darwin":
             builder.add("-search_paths_first", "-headerpad_max_install_names")
         case "linux":
-            if not dynamic:
+            if not dynamic and not fast_link:
                 builder.add("--gc-sections", "--gc-keep-exported")
         case "win32":
             if not dynamic:
@@ -473,23 +995,27 @@ def preprocess_environment(env, cjpm_args: list[str], use_static: bool):
         system_libs = run_llvm_config("--system-libs")
         libs.extend(system_libs.split())
 
-        # Static LLVM libs
-        static_libs = run_llvm_config("--link-static", "--libs")
-        for lib in static_libs.split():
-            lib_name = lib[2:]  # strip -l
-            if sys.platform != "darwin":
-                libs.append(f"-l:lib{lib_name}.a")
-            else:
-                libs.append(lib)
-
-        # Static libclang libs
-        libdir_path = Path(os.path.join(libclang_dir(), "lib"))
-        for lib in libdir_path.glob("libclang*.a"):
-            lib_name = lib.stem
-            if sys.platform != "darwin":
-                libs.append(f"-l:{lib_name}.a")
-            else:
-                libs.append(f"-l{lib_name[3:]}")  # strip 'lib' prefix
+        static_libs = run_llvm_config("--link-static", "--libs").split()
+        prelinked = ensure_prelinked_llvm(static_libs, options.prelink_report) if options.prelink else None
+        if prelinked:
+            libs.append(prelinked)
+        else:
+            # Static LLVM libs
+            for lib in static_libs:
+                lib_name = lib[2:]  # strip -l
+                if sys.platform != "darwin":
+                    libs.append(f"-l:lib{lib_name}.a")
+                else:
+                    libs.append(lib)
+
+            # Static libclang libs
+            libdir_path = Path(os.path.join(libclang_dir(), "lib"))
+            for lib in libdir_path.glob("libclang*.a"):
+                lib_name = lib.stem
+                if sys.platform != "darwin":
+                    libs.append(f"-l:{lib_name}.a")
+                else:
+                    libs.append(f"-l{lib_name[3:]}")  # strip 'lib' prefix
 
     # On static Windows builds, inject a shim for the codecvt ABI mismatch
     if not dynamic:
@@ -519,24 +1045,38 @@ def preprocess_environment(env, cjpm_args: list[str], use_static: bool):
 
 def main():
     base_env = os.environ.copy()
-    cjpm_args, use_static = parse_wrapper_args(sys.argv[1:])
-    if use_static:
+    cjpm_args, options = parse_wrapper_args(sys.argv[1:])
+    if options.prelink_only:
+        sys.exit(prelink_only(options))
+    if options.matrix is not None:
+        sys.exit(run_matrix(cjpm_args, options))
+    if options.static:
         cjpm_args.append("--cfg_static_libclang")
     else:
         cjpm_args.append("--cfg_dynamic_libclang")
-    processed_env = preprocess_environment(base_env, cjpm_args, use_static)
+    processed_env = preprocess_environment(base_env, cjpm_args, options)
+    linker = install_fast_linker(processed_env, options, "-g" in cjpm_args) if options.fast_link else None
 
     command = ["cjpm"] + cjpm_args
-
-    process = subprocess.run(
-        command,
-        env=processed_env,
-        stdin=sys.stdin,
-        stdout=sys.stdout,
-        stderr=sys.stderr,
-    )
-
-    sys.exit(process.returncode)
+    if options.timings:
+        # Verbose output echoes each tool invocation; one job keeps the
+        # output of different packages from interleaving.
+        command.append("-V")
+        if not any(arg in ("-j", "--jobs") or arg.startswith("--jobs=") for arg in cjpm_args):
+            command += ["-j", "1"]
+        returncode = run_timed(command, processed_env)
+    else:
+        returncode = subprocess.run(
+            command,
+            env=processed_env,
+            stdin=sys.stdin,
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+        ).returncode
+    if linker:
+        report_link_times(linker)
+
+    sys.exit(returncode)
 
 
 if __name__ == "__main__":
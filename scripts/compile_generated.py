@@ -76,6 +76,14 @@ EXPECTED_GENERATED: dict[str, Path] = {}
 
 SUPPORT_SOURCES: dict[str, str] = {}
 
+# Headers also compiled with ``--split-by``; each mode must produce a package
+# that builds and must not rewrite files on an identical second run.
+SPLIT_HEADERS: dict[str, list[str]] = {
+    "cxx-reopened-namespaces.hpp": ["namespace", "kind"],
+    "template_alias_namespace.hpp": ["namespace"],
+    "cxx-class-methods.hpp": ["header", "kind"],
+}
+
 
 def run(cmd: list[str], *, cwd: Path, env: dict[str, str] | None = None) -> None:
     printable = " ".join(str(part) for part in cmd)
@@ -120,6 +128,24 @@ def write_smoke_project(project: Path, generated: str, support: str | None = Non
         (project / "src/support.cj").write_text(support, encoding="utf-8")
 
 
+def generate_command(cli: Path, header: Path, out: Path) -> list[str]:
+    command = [
+        str(cli),
+        str(header),
+        "-o",
+        str(out),
+        "--package",
+        "cjbind_ffi",
+        "--no-detect-include-path",
+    ]
+    command.extend(HEADER_OPTIONS.get(header.name, []))
+    return command
+
+
+def clang_args(header: Path) -> list[str]:
+    return ["--", *HEADER_CLANG_ARGS.get(header.name, ["--target=x86_64-unknown-linux-gnu"])]
+
+
 def compile_header(cli: Path, header: Path, keep_temps: bool) -> None:
     temp_root = Path(tempfile.mkdtemp(prefix=f"cjbind-smoke-{header.stem}-"))
     failed = False
@@ -127,22 +153,7 @@ def compile_header(cli: Path, header: Path, keep_temps: bool) -> None:
         out = temp_root / "generated.cj"
         expected = EXPECTED_GENERATED.get(header.name)
         if expected is None:
-            command = [
-                str(cli),
-                str(header),
-                "-o",
-                str(out),
-                "--package",
-                "cjbind_ffi",
-                "--no-detect-include-path",
-            ]
-            command.extend(HEADER_OPTIONS.get(header.name, []))
-            command.append("--")
-            command.extend(HEADER_CLANG_ARGS.get(
-                header.name,
-                ["--target=x86_64-unknown-linux-gnu"],
-            ))
-            run(command, cwd=ROOT)
+            run([*generate_command(cli, header, out), *clang_args(header)], cwd=ROOT)
             generated = out.read_text(encoding="utf-8")
         else:
             generated = expected.read_text(encoding="utf-8")
@@ -164,6 +175,44 @@ def compile_header(cli: Path, header: Path, keep_temps: bool) -> None:
             shutil.rmtree(temp_root, ignore_errors=True)
 
 
+def compile_split_header(cli: Path, header: Path, mode: str, keep_temps: bool) -> None:
+    temp_root = Path(tempfile.mkdtemp(prefix=f"cjbind-split-{header.stem}-{mode}-"))
+    failed = False
+    try:
+        project = temp_root / "project"
+        write_smoke_project(project, "", SUPPORT_SOURCES.get(header.name))
+        src = project / "src"
+        (src / "wrap.cj").unlink()
+        command = [*generate_command(cli, header, src), "--split-by", mode, *clang_args(header)]
+        run(command, cwd=ROOT)
+
+        generated = sorted(src.glob("*.cj"))
+        if not any(path.name == "prelude.cj" for path in generated):
+            raise RuntimeError(f"--split-by {mode} did not write prelude.cj for {header.name}")
+        stamps = {path.name: path.stat().st_mtime_ns for path in generated}
+
+        run(command, cwd=ROOT)
+        rewritten = [
+            path.name for path in sorted(src.glob("*.cj"))
+            if stamps.get(path.name) != path.stat().st_mtime_ns
+        ]
+        if rewritten:
+            raise RuntimeError(f"identical regeneration rewrote {', '.join(rewritten)}")
+
+        run(["cjpm", "build", "--target-dir", str(temp_root / "target"), "-V"], cwd=project)
+    except (subprocess.CalledProcessError, RuntimeError) as exc:
+        failed = True
+        print(f"split compile smoke failed for {header} (--split-by {mode})", file=sys.stderr)
+        print(f"temporary files kept at {temp_root}", file=sys.stderr)
+        if isinstance(exc, RuntimeError):
+            print(exc, file=sys.stderr)
+            raise SystemExit(1) from exc
+        raise SystemExit(exc.returncode) from exc
+    finally:
+        if not keep_temps and not failed:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--skip-build", action="store_true")
@@ -188,6 +237,10 @@ def main() -> None:
     for header in HEADERS:
         compile_header(cli, header, args.keep_temps)
 
+    for header in HEADERS:
+        for mode in SPLIT_HEADERS.get(header.name, []):
+            compile_split_header(cli, header, mode, args.keep_temps)
+
 
 if __name__ == "__main__":
     main()
@@ -6,12 +6,16 @@
 # ]
 # ///
 
+import argparse
 import json
+import os
 import platform
 import shutil
 import subprocess
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
 from tempfile import mkdtemp
 from typing import Optional
 
@@ -19,12 +23,28 @@ import requests
 from tqdm import tqdm
 
 
+@dataclass(frozen=True)
+class ArchiveMember:
+    """压缩包中的一个文件"""
+    path: str
+    size: int
+    # 固实压缩块编号；非固实压缩包中为 None
+    block: Optional[str]
+
+
 class LibClangInstaller:
-    """用于自动下载和安装 libclang 的安装器"""
+    """用于自动下载和安装 libclang 的安装器
 
-    def __init__(self):
+    mode 为 "full" 时解压整个压缩包；为 "static" 或 "dynamic" 时只解压
+    libclang.json 中 members 清单为对应链接方式列出的文件。
+    """
+
+    def __init__(self, mode: str = "full", jobs: Optional[int] = None):
         self.base_dir = Path(__file__).parent.resolve()
+        self.mode = mode
+        self.jobs = jobs or os.cpu_count() or 1
         self.url_map = self._load_url_map()
+        self.member_patterns = self._load_member_patterns()
         self.system_key = self._detect_system()
         self.download_url = self._get_download_url()
         self.temp_dir = Path(mkdtemp(prefix="libclang_"))
@@ -39,6 +59,15 @@ class LibClangInstaller:
             data = json.load(f)
         return data["urls"]
 
+    def _load_member_patterns(self) -> list[str]:
+        """从 libclang.json 加载所选链接方式需要的文件模式（相对 libclang 目录）"""
+        if self.mode == "full":
+            return []
+        json_path = self.base_dir / "libclang.json"
+        with open(json_path, "r", encoding="utf-8") as f:
+            members = json.load(f)["members"]
+        return members["common"] + members[self.mode]
+
     def _detect_system(self) -> str:
         """检测操作系统和架构"""
         system = platform.system().lower()
@@ -102,20 +131,108 @@ class LibClangInstaller:
             self._cleanup()
             raise RuntimeError(f"Download failed: {str(e)}")
 
-    def _extract_archive(self) -> None:
-        """使用系统 7z 命令解压（py7zr 不支持 BCJ2 过滤器）"""
-        self.extract_dir = Path(mkdtemp(prefix="libclang_extract_"))
-        seven_z = self._find_7z()
-
-        print("Extracting...")
+    def _run_7z(self, *args: str) -> str:
         result = subprocess.run(
-            [seven_z, "x", str(self.temp_archive), f"-o{self.extract_dir}", "-y"],
+            [self._find_7z(), *args],
             capture_output=True,
             text=True,
+            encoding="utf-8",
+            errors="replace",
         )
         if result.returncode != 0:
+            raise RuntimeError(f"7z {args[0]} failed: {result.stderr}")
+        return result.stdout
+
+    def _list_archive(self) -> list[ArchiveMember]:
+        """列出压缩包中的文件（不含目录）"""
+        output = self._run_7z("l", "-slt", "-sccUTF-8", str(self.temp_archive))
+        # 第一条分隔线之前是压缩包自身的属性
+        _, _, entries = output.partition("\n----------\n")
+        members = []
+        for record in entries.split("\n\n"):
+            fields = {}
+            for line in record.splitlines():
+                key, sep, value = line.partition(" = ")
+                if sep:
+                    fields[key] = value
+            if "Path" not in fields or fields.get("Folder") == "+":
+                continue
+            members.append(ArchiveMember(
+                path=fields["Path"].replace("\\", "/"),
+                size=int(fields.get("Size") or 0),
+                block=fields.get("Block") or None,
+            ))
+        return members
+
+    def _select_members(self, members: list[ArchiveMember]) -> list[ArchiveMember]:
+        """按清单挑选所需文件；路径中 libclang 目录之后的部分与模式匹配"""
+        selected = []
+        for member in members:
+            parts = member.path.split("/")
+            if "libclang" not in parts:
+                continue
+            relative = PurePosixPath(*parts[parts.index("libclang") + 1:])
+            if any(relative.full_match(pattern) for pattern in self.member_patterns):
+                selected.append(member)
+        return selected
+
+    def _extract_members(self, members: list[ArchiveMember]) -> None:
+        """解压指定文件
+
+        固实压缩包中，同一压缩块里的文件必须从块头依次解压，因此按块分组，
+        每个 7z 进程负责若干整块，不同块之间并行解压。
+        """
+        groups: dict[Optional[str], list[ArchiveMember]] = {}
+        for member in members:
+            groups.setdefault(member.block, []).append(member)
+        # 按大小均分到各个进程
+        workers = max(1, min(self.jobs, len(groups)))
+        batches: list[list[ArchiveMember]] = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for group in sorted(groups.values(), key=lambda g: sum(m.size for m in g), reverse=True):
+            target = loads.index(min(loads))
+            batches[target].extend(group)
+            loads[target] += sum(m.size for m in group)
+
+        def extract(index: int, batch: list[ArchiveMember]) -> None:
+            list_file = self.temp_dir / f"members_{index}.txt"
+            list_file.write_text("\n".join(m.path for m in batch) + "\n", encoding="utf-8")
+            self._run_7z(
+                "x", str(self.temp_archive), f"-o{self.extract_dir}", "-y",
+                "-scsUTF-8", f"@{list_file}",
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(extract, i, batch) for i, batch in enumerate(batches)]:
+                future.result()
+
+    def _extract_archive(self) -> None:
+        """使用系统 7z 命令解压（py7zr 不支持 BCJ2 过滤器）"""
+        self.extract_dir = Path(mkdtemp(prefix="libclang_extract_"))
+
+        try:
+            if self.mode == "full":
+                print("Extracting...")
+                self._run_7z("x", str(self.temp_archive), f"-o{self.extract_dir}", "-y")
+                return
+
+            members = self._list_archive()
+            selected = self._select_members(members)
+            if not any(PurePosixPath(m.path).stem == "llvm-config" for m in selected):
+                print("Warning: archive layout not recognised, extracting everything")
+                self._run_7z("x", str(self.temp_archive), f"-o{self.extract_dir}", "-y")
+                return
+
+            total = sum(m.size for m in members)
+            needed = sum(m.size for m in selected)
+            print(
+                f"Extracting {len(selected)}/{len(members)} files for {self.mode} linking "
+                f"({needed / 2**20:.0f} of {total / 2**20:.0f} MiB)..."
+            )
+            self._extract_members(selected)
+        except Exception:
             self._cleanup()
-            raise RuntimeError(f"Extraction failed: {result.stderr}")
+            raise
 
     def _find_libclang_dir(self) -> Path:
         """查找解压后的 libclang 目录"""
@@ -165,8 +282,18 @@ class LibClangInstaller:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="下载并安装 libclang")
+    parser.add_argument(
+        "--mode",
+        choices=["full", "static", "dynamic"],
+        default="full",
+        help="full 解压整个压缩包；static/dynamic 只解压对应链接方式所需的文件",
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="并行解压的 7z 进程数，默认为 CPU 核数")
+    args = parser.parse_args()
+
     try:
-        installer = LibClangInstaller()
+        installer = LibClangInstaller(args.mode, args.jobs)
         installer.run()
     except Exception as e:
         print(f"\nError: {str(e)}")
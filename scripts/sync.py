@@ -6,122 +6,263 @@
 #     "tqdm>=4.67.1",
 # ]
 # ///
+"""Mirror a GitHub release, assets included, to GitCode.
 
+Assets are transferred concurrently.  By default each one is streamed from
+the source download straight into the destination upload; ``--staging-dir``
+keeps a copy on disk instead.  Assets already on the destination with the
+same size, and digest where both sides report one, are skipped, and failed
+transfers are retried with exponential backoff.  Both endpoints can be
+pointed elsewhere, such as at a local stand-in server.
+"""
+
+import argparse
+import hashlib
 import os
-import sys
-import tempfile
-from typing import Tuple, List, Dict
-import requests
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from github import Github, Auth
-from github.Repository import Repository
-from github.GitRelease import GitRelease
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+import requests
+from github import Auth, Github
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
-from tqdm.utils import CallbackIOWrapper
 
-g: Github = Github(auth=Auth.Token(os.environ.get("GITHUB_TOKEN")))
+T = TypeVar("T")
 
-def resolve_version(version: str, repo: Repository) -> str:
-    if version == "latest":
-        release = repo.get_latest_release()
-        return release.tag_name
-    return version
+CHUNK_SIZE = 1024 * 1024
 
 
-def download_releases(version: str) -> Tuple[Path, str, str, str]:
-    repo: Repository = g.get_repo("cjbind/cjbind")
+@dataclass(frozen=True)
+class Endpoints:
+    source_api: str
+    source_repo: str
+    dest_api: str
+    dest_repo: str
 
-    tag_name: str = resolve_version(version, repo)
 
-    temp_dir: Path = Path(tempfile.mkdtemp(prefix="cjbind_releases_"))
+@dataclass(frozen=True)
+class Asset:
+    name: str
+    size: int
+    url: str
+    # "<algorithm>:<hex>", when the source reports one.
+    digest: Optional[str] = None
 
-    release: GitRelease = repo.get_release(tag_name)
-    releases: List[GitRelease] = [release]
 
-    for release in releases:
-        release_dir: Path = temp_dir / release.tag_name
-        release_dir.mkdir(exist_ok=True)
+@dataclass
+class Release:
+    tag_name: str
+    target_commitish: str
+    name: str
+    body: str
+    assets: List[Asset] = field(default_factory=list)
 
-        assets = list(release.get_assets())
-        for asset in assets:
-            asset_path: Path = release_dir / asset.name
 
-            response: requests.Response = requests.get(
-                asset.browser_download_url, stream=True
-            )
-            if not response.ok:
-                print(f"Failed to download file: {asset.name}")
-                response.raise_for_status()
-
-            total_size = int(response.headers.get('content-length', 0))
-            
-            with open(asset_path, "wb") as f:
-                with tqdm(total=total_size, unit='B', unit_scale=True, desc=asset.name, leave=True) as pbar:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        pbar.update(len(chunk))
-
-    print(f"Downloaded releases to: {temp_dir}")
-    return [
-        temp_dir,
-        release.tag_name,
-        release.target_commitish,
-        release.name,
-        release.body,
-    ]
+@dataclass(frozen=True)
+class RemoteAsset:
+    size: Optional[int]
+    digest: Optional[str]
+
+
+class TransferError(Exception):
+    """A failure worth retrying: a dropped connection or a 429/5xx reply."""
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """A session whose connection pool is shared by all transfer workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def check(response: requests.Response, action: str) -> requests.Response:
+    if response.status_code == 429 or response.status_code >= 500:
+        raise TransferError(f"{action}: HTTP {response.status_code} {response.text[:200]}")
+    if not response.ok:
+        print(f"Failed to {action}: {response.text}")
+        response.raise_for_status()
+    return response
+
 
-def upload_releases(
-    release_dir: Path, tag_name: str, target_commitish: str, title: str, body: str
-) -> None:
-    gitcode_token: str | None = os.environ.get("GITCODE_TOKEN")
+def with_retries(action: Callable[[], T], description: str, attempts: int, backoff: float) -> T:
+    for attempt in range(1, attempts + 1):
+        try:
+            return action()
+        except (TransferError, requests.ConnectionError, requests.Timeout) as error:
+            if attempt == attempts:
+                raise
+            delay = backoff * 2 ** (attempt - 1) * (1 + random.random() / 2)
+            tqdm.write(f"{description} failed ({error}), retrying in {delay:.1f}s [{attempt}/{attempts}]")
+            time.sleep(delay)
+    raise AssertionError("unreachable")
 
-    auth_param = {"access_token": gitcode_token}
 
-    session: requests.Session = requests.Session()
+def fetch_release(version: str, endpoints: Endpoints, token: Optional[str]) -> Release:
+    auth = Auth.Token(token) if token else None
+    github = Github(base_url=endpoints.source_api, auth=auth)
+    repo = github.get_repo(endpoints.source_repo)
+    release = repo.get_latest_release() if version == "latest" else repo.get_release(version)
+    assets = [
+        Asset(
+            name=asset.name,
+            size=asset.size,
+            url=asset.browser_download_url,
+            digest=getattr(asset, "digest", None),
+        )
+        for asset in release.get_assets()
+    ]
+    return Release(
+        tag_name=release.tag_name,
+        target_commitish=release.target_commitish,
+        name=release.title,
+        body=release.body or "",
+        assets=assets,
+    )
+
+
+def ensure_release(
+    session: requests.Session, release: Release, endpoints: Endpoints, token: Optional[str]
+) -> Dict[str, RemoteAsset]:
+    """Creates the destination release if needed and lists its assets."""
+    auth_param = {"access_token": token}
+    base = f"{endpoints.dest_api}/repos/{endpoints.dest_repo}/releases"
 
     # https://api.gitcode.com/api/v5/repos/:owner/:repo/releases
     payload: Dict[str, str] = {
-        "tag_name": tag_name,
-        "name": title,
-        "body": body,
-        "target_commitish": target_commitish,
+        "tag_name": release.tag_name,
+        "name": release.name,
+        "body": release.body,
+        "target_commitish": release.target_commitish,
     }
-    response: requests.Response = session.post(
-        "https://api.gitcode.com/api/v5/repos/Cangjie-TPC/cjbind/releases",
-        json=payload,
-        params=auth_param
-    )
+    response = session.post(base, json=payload, params=auth_param, timeout=30)
     if not response.ok:
-        print(f"Failed to create release: {response.text}")
-        
         error_data = response.json()
         if error_data.get("error_code") == 409:
-            print(f"Release already exists: {tag_name}")
+            print(f"Release already exists: {release.tag_name}")
         else:
+            print(f"Failed to create release: {response.text}")
             response.raise_for_status()
     else:
         print(f"Created release at: {response.text}")
-    
-
-    # https://api.gitcode.com/api/v5/repos/:owner/:repo/releases/:tag/upload_url
-
-    files = list(release_dir.glob("**/*"))
-    files = [f for f in files if f.is_file()]
-    
-    for file in files:
-        file_name: str = file.name
-
-        response = session.get(
-            f"https://api.gitcode.com/api/v5/repos/Cangjie-TPC/cjbind/releases/{tag_name}/upload_url",
-            params={
-                "file_name": file_name,
-                "access_token": gitcode_token
-            }
-        )
-        if not response.ok:
-            print(f"Failed to get upload url: {response.text}")
-            response.raise_for_status()
 
+    # https://api.gitcode.com/api/v5/repos/:owner/:repo/releases/tags/:tag
+    response = session.get(f"{base}/tags/{release.tag_name}", params=auth_param, timeout=30)
+    if not response.ok:
+        return {}
+    existing: Dict[str, RemoteAsset] = {}
+    for asset in response.json().get("assets") or []:
+        name = asset.get("name")
+        if not name:
+            continue
+        size = asset.get("size")
+        if size is None and asset.get("browser_download_url"):
+            size = remote_size(session, asset["browser_download_url"])
+        existing[name] = RemoteAsset(size=size, digest=asset.get("digest"))
+    return existing
+
+
+def remote_size(session: requests.Session, url: str) -> Optional[int]:
+    try:
+        response = session.head(url, allow_redirects=True, timeout=30)
+    except requests.RequestException:
+        return None
+    length = response.headers.get("content-length")
+    return int(length) if response.ok and length is not None else None
+
+
+def up_to_date(asset: Asset, existing: Optional[RemoteAsset]) -> bool:
+    if existing is None or existing.size != asset.size:
+        return False
+    return existing.digest is None or asset.digest is None or existing.digest == asset.digest
+
+
+class DigestVerifier:
+    """Hashes bytes as they pass and checks them against the source digest."""
+
+    def __init__(self, asset: Asset) -> None:
+        self.asset = asset
+        self.expected: Optional[str] = None
+        self.hash = None
+        if asset.digest and ":" in asset.digest:
+            algorithm, self.expected = asset.digest.split(":", 1)
+            if algorithm in hashlib.algorithms_available:
+                self.hash = hashlib.new(algorithm)
+
+    def update(self, chunk: bytes) -> None:
+        if self.hash is not None:
+            self.hash.update(chunk)
+
+    def verify(self) -> None:
+        if self.hash is not None and self.hash.hexdigest() != self.expected:
+            raise TransferError(f"{self.asset.name}: digest mismatch, expected {self.asset.digest}")
+
+
+class SourceStream:
+    """A file-like view of a download, so that an upload can read from it.
+
+    Its length is the source size, which lets requests send a
+    Content-Length header instead of a chunked body.
+    """
+
+    def __init__(self, response: requests.Response, asset: Asset, progress: tqdm, lock: threading.Lock) -> None:
+        self.chunks: Iterator[bytes] = response.iter_content(chunk_size=CHUNK_SIZE)
+        self.buffer = b""
+        self.remaining = asset.size
+        self.verifier = DigestVerifier(asset)
+        self.progress = progress
+        self.lock = lock
+
+    def __len__(self) -> int:
+        return self.remaining + len(self.buffer)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.buffer or size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.verifier.update(chunk)
+            self.remaining -= len(chunk)
+            self.buffer += chunk
+        if size < 0 or size >= len(self.buffer):
+            data, self.buffer = self.buffer, b""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        if not data:
+            self.verifier.verify()
+        with self.lock:
+            self.progress.update(len(data))
+        return data
+
+
+class Mirror:
+    def __init__(self, endpoints: Endpoints, token: Optional[str], args: argparse.Namespace) -> None:
+        self.endpoints = endpoints
+        self.token = token
+        self.source = make_session(args.jobs)
+        self.dest = make_session(args.jobs)
+        self.timeout = (30, args.timeout)
+        self.attempts = args.retries + 1
+        self.backoff = args.backoff
+        self.staging_dir: Optional[Path] = args.staging_dir
+        self.lock = threading.Lock()
+
+    def upload_target(self, tag_name: str, asset: Asset) -> tuple[str, Dict[str, str]]:
+        # https://api.gitcode.com/api/v5/repos/:owner/:repo/releases/:tag/upload_url
+        response = check(
+            self.dest.get(
+                f"{self.endpoints.dest_api}/repos/{self.endpoints.dest_repo}/releases/{tag_name}/upload_url",
+                params={"file_name": asset.name, "access_token": self.token},
+                timeout=self.timeout,
+            ),
+            "get upload url",
+        )
         # {
         #   "url": "string",
         #   "headers": {
@@ -132,32 +273,114 @@ def upload_releases(
         #   }
         # }
         response_data = response.json()
-        url = response_data["url"]
-        headers = response_data["headers"]
+        return response_data["url"], response_data["headers"]
 
-        file_size = file.stat().st_size
-        with open(file, "rb") as f:
-            with tqdm(total=file_size, unit="B", unit_scale=True, unit_divisor=1024, desc=f"Uploading {file_name}", leave=True) as t:
-                wrapped_file = CallbackIOWrapper(t.update, f, "read")
-                response = session.put(url, data=wrapped_file, headers=headers, timeout=30)
-                if not response.ok:
-                    print(f"Failed to upload file: {response.text}")
-                    response.raise_for_status()
-                print(f"Uploaded file: {file_name}")
+    def download(self, asset: Asset) -> requests.Response:
+        return check(
+            self.source.get(asset.url, stream=True, timeout=self.timeout),
+            f"download file {asset.name}",
+        )
 
+    def stream(self, tag_name: str, asset: Asset, progress: tqdm) -> None:
+        url, headers = self.upload_target(tag_name, asset)
+        with self.download(asset) as response:
+            body = SourceStream(response, asset, progress, self.lock)
+            check(
+                self.dest.put(url, data=body, headers=headers, timeout=self.timeout),
+                f"upload file {asset.name}",
+            )
+
+    def stage(self, tag_name: str, asset: Asset, progress: tqdm) -> None:
+        assert self.staging_dir is not None
+        path = self.staging_dir / tag_name / asset.name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not (path.is_file() and path.stat().st_size == asset.size):
+            partial = path.with_name(path.name + ".part")
+            verifier = DigestVerifier(asset)
+            with self.download(asset) as response, open(partial, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    verifier.update(chunk)
+                    f.write(chunk)
+            verifier.verify()
+            partial.replace(path)
+
+        url, headers = self.upload_target(tag_name, asset)
+        with open(path, "rb") as f:
+            check(
+                self.dest.put(url, data=f, headers=headers, timeout=self.timeout),
+                f"upload file {asset.name}",
+            )
+        with self.lock:
+            progress.update(asset.size)
+
+    def transfer(self, tag_name: str, asset: Asset, progress: tqdm) -> None:
+        transfer = self.stage if self.staging_dir is not None else self.stream
+        with_retries(
+            lambda: transfer(tag_name, asset, progress),
+            f"Transfer of {asset.name}",
+            self.attempts,
+            self.backoff,
+        )
+        tqdm.write(f"Uploaded file: {asset.name}")
+
+    def run(self, release: Release, jobs: int) -> None:
+        existing = ensure_release(self.dest, release, self.endpoints, self.token)
+        pending = [asset for asset in release.assets if not up_to_date(asset, existing.get(asset.name))]
+        for asset in release.assets:
+            if asset not in pending:
+                print(f"Skipping up-to-date file: {asset.name}")
+        if not pending:
+            return
+
+        total = sum(asset.size for asset in pending)
+        with tqdm(total=total, unit="B", unit_scale=True, unit_divisor=1024, desc=release.tag_name) as progress:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(self.transfer, release.tag_name, asset, progress): asset for asset in pending}
+                failures = []
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as error:  # noqa: BLE001 - report every failed asset
+                        failures.append(f"{futures[future].name}: {error}")
+        if failures:
+            raise SystemExit("Failed to mirror:\n  " + "\n  ".join(failures))
 
-if __name__ == "__main__":
-    version: str = sys.argv[1] if len(sys.argv) > 1 else "latest"
-    release_dir: Path   
-    tag_name: str
-    target_commitish: str
-    title: str
-    body: str
-    release_dir, tag_name, target_commitish, title, body = download_releases(version)
 
-    print(f"Release directory: {release_dir}")
-    print(f"Version: {tag_name}")
-    print(f"Target commitish: {target_commitish}")
-    print(f"Title: {title}")
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("version", nargs="?", default="latest", help="release tag, or latest")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="assets transferred at once")
+    parser.add_argument("--retries", type=int, default=4, help="retries per asset after a failure")
+    parser.add_argument("--backoff", type=float, default=2.0, help="first retry delay in seconds, doubled each time")
+    parser.add_argument("--timeout", type=float, default=300.0, help="read timeout per request in seconds")
+    parser.add_argument("--staging-dir", type=Path, help="download assets here before uploading instead of streaming")
+    parser.add_argument(
+        "--source-api", default=os.environ.get("SYNC_SOURCE_API", "https://api.github.com"),
+    )
+    parser.add_argument("--source-repo", default=os.environ.get("SYNC_SOURCE_REPO", "cjbind/cjbind"))
+    parser.add_argument(
+        "--dest-api", default=os.environ.get("SYNC_DEST_API", "https://api.gitcode.com/api/v5"),
+    )
+    parser.add_argument("--dest-repo", default=os.environ.get("SYNC_DEST_REPO", "Cangjie-TPC/cjbind"))
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    endpoints = Endpoints(
+        source_api=args.source_api.rstrip("/"),
+        source_repo=args.source_repo,
+        dest_api=args.dest_api.rstrip("/"),
+        dest_repo=args.dest_repo,
+    )
+    release = fetch_release(args.version, endpoints, os.environ.get("GITHUB_TOKEN"))
 
-    upload_releases(release_dir, tag_name, target_commitish, title, body)
+    print(f"Version: {release.tag_name}")
+    print(f"Target commitish: {release.target_commitish}")
+    print(f"Title: {release.name}")
+    print(f"Assets: {len(release.assets)}")
+
+    Mirror(endpoints, os.environ.get("GITCODE_TOKEN"), args).run(release, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,305 @@
 #!/usr/bin/env python3
-"""Link and execute the generated C++ lifecycle binding."""
+"""Link and execute the generated bindings of the C++ runtime fixtures.
+
+Each directory under cjbind_test/runtime is a fixture: C/C++ sources, a
+main.cj driving them, and the generated binding
+cjbind_test/testdata/expected/cxx-runtime-<fixture>.cj.  Fixtures are built
+and run in parallel.  Objects are cached under target/cxx-runtime-cache by
+the contents of their sources and every header they include, and test
+programs by the contents of their binding, driver and objects, so only
+fixtures whose inputs changed are compiled again.
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import os
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 
 ROOT = Path(__file__).resolve().parents[1]
-FIXTURE = ROOT / "cjbind_test/runtime"
-GENERATED = ROOT / "cjbind_test/testdata/expected/cxx-runtime-lifecycle.cj"
+FIXTURES = ROOT / "cjbind_test/runtime"
+EXPECTED = ROOT / "cjbind_test/testdata/expected"
+CACHE = ROOT / "target/cxx-runtime-cache"
+SOURCE_SUFFIXES = {".c", ".cc", ".cpp", ".cxx"}
 
 
-def run(command: list[str], *, cwd: Path) -> None:
-    print("+ " + " ".join(command), flush=True)
-    subprocess.run(command, cwd=cwd, check=True)
+@dataclass
+class Fixture:
+    name: str
+    directory: Path
+    generated: Path
+    sources: list[Path]
 
 
-def find_cxx() -> str:
-    requested = os.environ.get("CXX")
+@dataclass
+class FixtureResult:
+    fixture: Fixture
+    passed: bool
+    seconds: float
+    log: list[str] = field(default_factory=list)
+    cached: int = 0
+    steps: int = 0
+
+
+def run(command: list[str], *, cwd: Path, log: list[str]) -> None:
+    log.append("+ " + " ".join(command))
+    result = subprocess.run(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        check=False,
+    )
+    if result.stdout:
+        log.append(result.stdout.rstrip())
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, command)
+
+
+def find_compiler(variable: str, candidates: tuple[str, ...], description: str) -> str:
+    requested = os.environ.get(variable)
     if requested:
         return requested
-    for candidate in ("clang++", "g++"):
+    for candidate in candidates:
         located = shutil.which(candidate)
         if located:
             return located
-    raise RuntimeError("a C++14 compiler is required (set CXX to its executable)")
+    raise RuntimeError(f"{description} is required (set {variable} to its executable)")
+
+
+def find_cxx() -> str:
+    return find_compiler("CXX", ("clang++", "g++"), "a C++14 compiler")
+
+
+def find_cc() -> str:
+    return find_compiler("CC", ("clang", "gcc"), "a C compiler")
 
 
 def executable_name() -> str:
     return "cxx-runtime-test.exe" if os.name == "nt" else "cxx-runtime-test"
 
 
+def object_suffix() -> str:
+    return ".obj" if os.name == "nt" else ".o"
+
+
+def discover(names: list[str]) -> list[Fixture]:
+    fixtures = []
+    for directory in sorted(path for path in FIXTURES.iterdir() if (path / "main.cj").is_file()):
+        sources = sorted(path for path in directory.iterdir() if path.suffix in SOURCE_SUFFIXES)
+        generated = EXPECTED / f"cxx-runtime-{directory.name}.cj"
+        fixtures.append(Fixture(directory.name, directory, generated, sources))
+    if names:
+        known = {fixture.name for fixture in fixtures}
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise SystemExit(f"unknown fixture {', '.join(unknown)}; choose from {', '.join(sorted(known))}")
+        fixtures = [fixture for fixture in fixtures if fixture.name in names]
+    return fixtures
+
+
+def digest(*parts: str | bytes) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode("utf-8") if isinstance(part, str) else part)
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def file_digest(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+_tool_versions: dict[str, str] = {}
+
+
+def tool_version(tool: str) -> str:
+    if tool not in _tool_versions:
+        result = subprocess.run([tool, "--version"], capture_output=True, text=True, check=False)
+        _tool_versions[tool] = tool + "\n" + result.stdout
+    return _tool_versions[tool]
+
+
+def parse_depfile(text: str) -> list[str]:
+    """The prerequisites listed in a make-style dependency file."""
+    _, _, prerequisites = text.replace("\\\n", " ").partition(": ")
+    return [word.replace("\\ ", " ") for word in re.split(r"(?<!\\)\s+", prerequisites) if word]
+
+
+class ObjectCache:
+    """Compiled objects keyed by compiler, flags, source and included headers.
+
+    The compiler's dependency file names the headers behind an object; their
+    digests are kept in a manifest and checked again on lookup, so a header
+    edit misses the cache even though the source itself is unchanged.
+    """
+
+    def __init__(self, compiler: str, flags: list[str], source: Path) -> None:
+        source_digest = file_digest(source) or ""
+        self.key = digest(tool_version(compiler), *flags, str(source), source_digest)
+
+    def manifest(self) -> Path:
+        return CACHE / f"{self.key}.deps"
+
+    def object(self, lines: list[str]) -> Path:
+        return CACHE / f"{self.key}-{digest(*lines)[:32]}{object_suffix()}"
+
+    def lookup(self) -> Path | None:
+        try:
+            lines = self.manifest().read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return None
+        for line in lines:
+            expected, _, path = line.partition("\t")
+            if file_digest(Path(path)) != expected:
+                return None
+        cached = self.object(lines)
+        return cached if cached.is_file() else None
+
+    def store(self, built: Path, dependencies: list[str]) -> Path:
+        lines = []
+        for dependency in dict.fromkeys(dependencies):
+            path = Path(dependency)
+            if not path.is_absolute():
+                path = ROOT / path
+            lines.append(f"{file_digest(path) or ''}\t{path.resolve()}")
+        CACHE.mkdir(parents=True, exist_ok=True)
+        target = self.object(lines)
+        os.replace(built, target)
+        manifest = built.with_suffix(".deps")
+        manifest.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(manifest, self.manifest())
+        return target
+
+
+def compile_object(source: Path, scratch: Path, result: FixtureResult, use_cache: bool) -> Path:
+    if source.suffix == ".c":
+        compiler, flags = find_cc(), ["-std=c11"]
+    else:
+        compiler, flags = find_cxx(), ["-std=c++14", "-fno-exceptions", "-fno-rtti"]
+    cache = ObjectCache(compiler, flags, source)
+    result.steps += 1
+    if use_cache and (cached := cache.lookup()) is not None:
+        result.cached += 1
+        result.log.append(f"= {source.relative_to(ROOT)} (cached object)")
+        return cached
+
+    built = scratch / (source.stem + object_suffix())
+    depfile = scratch / (source.stem + ".d")
+    run(
+        [compiler, *flags, "-MD", "-MF", str(depfile), "-c", str(source), "-o", str(built)],
+        cwd=ROOT,
+        log=result.log,
+    )
+    if not use_cache:
+        return built
+    return cache.store(built, parse_depfile(depfile.read_text(encoding="utf-8")))
+
+
+def build_program(fixture: Fixture, objects: list[Path], scratch: Path, result: FixtureResult, use_cache: bool) -> Path:
+    inputs = [fixture.generated, fixture.directory / "main.cj"]
+    key = digest(
+        tool_version("cjc"),
+        *(file_digest(path) or "" for path in inputs),
+        *(file_digest(path) or "" for path in objects),
+    )
+    cached = CACHE / f"{fixture.name}-{key[:32]}-{executable_name()}"
+    result.steps += 1
+    if use_cache and cached.is_file():
+        result.cached += 1
+        result.log.append(f"= {fixture.name} program (cached)")
+        return cached
+
+    output = scratch / executable_name()
+    run(
+        [
+            "cjc",
+            *map(str, inputs),
+            *(f"--link-option={path}" for path in objects),
+            "--static",
+            "-Woff",
+            "unused",
+            "-o",
+            str(output),
+        ],
+        cwd=ROOT,
+        log=result.log,
+    )
+    if not use_cache:
+        return output
+    CACHE.mkdir(parents=True, exist_ok=True)
+    os.replace(output, cached)
+    return cached
+
+
+def run_fixture(fixture: Fixture, keep_temps: bool, use_cache: bool) -> FixtureResult:
+    result = FixtureResult(fixture, passed=False, seconds=0.0)
+    start = time.perf_counter()
+    if not fixture.generated.exists():
+        result.log.append(f"{fixture.generated} is missing; run the snapshot tests first")
+        return result
+
+    scratch = Path(tempfile.mkdtemp(prefix=f"cjbind-cxx-runtime-{fixture.name}-"))
+    try:
+        objects = [compile_object(source, scratch, result, use_cache) for source in fixture.sources]
+        program = build_program(fixture, objects, scratch, result, use_cache)
+        run([str(program)], cwd=scratch, log=result.log)
+        result.passed = True
+    except (subprocess.CalledProcessError, RuntimeError) as error:
+        result.log.append(str(error))
+    finally:
+        result.seconds = time.perf_counter() - start
+        if keep_temps or not result.passed:
+            result.log.append(f"C++ runtime test files kept at {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return result
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures", nargs="*", help="fixtures to run; default all")
     parser.add_argument("--keep-temps", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="rebuild objects and programs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
     args = parser.parse_args()
 
-    if not GENERATED.exists():
-        raise RuntimeError("generated lifecycle binding is missing; run the snapshot tests first")
+    fixtures = discover(args.fixtures)
+    if not fixtures:
+        raise RuntimeError(f"no runtime fixtures found under {FIXTURES}")
 
-    temp_root = Path(tempfile.mkdtemp(prefix="cjbind-cxx-runtime-"))
-    failed = False
-    try:
-        object_path = temp_root / ("cxx_lifecycle.obj" if os.name == "nt" else "cxx_lifecycle.o")
-        run(
-            [
-                find_cxx(),
-                "-std=c++14",
-                "-fno-exceptions",
-                "-fno-rtti",
-                "-c",
-                str(FIXTURE / "cxx_lifecycle.cpp"),
-                "-o",
-                str(object_path),
-            ],
-            cwd=ROOT,
-        )
-
-        output = temp_root / executable_name()
-        run(
-            [
-                "cjc",
-                str(GENERATED),
-                str(FIXTURE / "main.cj"),
-                f"--link-option={object_path}",
-                "--static",
-                "-Woff",
-                "unused",
-                "-o",
-                str(output),
-            ],
-            cwd=ROOT,
-        )
-        run([str(output)], cwd=temp_root)
-    except subprocess.CalledProcessError:
-        failed = True
-        print(f"C++ runtime test files kept at {temp_root}", file=sys.stderr)
-        raise
-    finally:
-        if not args.keep_temps and not failed:
-            shutil.rmtree(temp_root, ignore_errors=True)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(run_fixture, fixture, args.keep_temps, not args.no_cache) for fixture in fixtures]
+        results = []
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            status = "ok" if result.passed else "FAILED"
+            print(f"== {result.fixture.name}: {status}", flush=True)
+            print("\n".join(result.log), file=sys.stdout if result.passed else sys.stderr, flush=True)
+
+    print()
+    for result in results:
+        status = "ok" if result.passed else "FAILED"
+        print(f"{result.fixture.name:<24} {status:<7} {result.seconds:7.2f}s  {result.cached}/{result.steps} cached")
+    if not all(result.passed for result in results):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":